@@ -1,246 +1,333 @@
 import os
 import subprocess
+import functools
 import shutil
 import re
+import shlex
+import tempfile
 import logging
-import random
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+_REPO_RE = re.compile(r"/([^/]+?)(?:\.git)?/?$")
+_GH_RE = re.compile(r"github\.com/[^/]+/([^/.]+)")
 
-def run_command(command, exit_on_error=True, cwd=None):
-    """Run a shell command and handle errors."""
-    result = subprocess.run(command, shell=True, capture_output=True, text=True, cwd=cwd)
+def run_command(argv, exit_on_error=True, cwd=None):
+    """Run a command given as an argv list and handle errors."""
+    try:
+        result = subprocess.run(argv, capture_output=True, text=True, cwd=cwd)
+    except OSError as e:
+        logger.error("Error running command: %s", shlex.join(argv))
+        logger.error("Error output: %s", e)
+        if exit_on_error:
+            exit(1)
+        return ""
     if result.returncode != 0:
-        logging.error(f"Error running command: {command}")
-        logging.error(f"Error output: {result.stderr}")
+        logger.error("Error running command: %s", shlex.join(argv))
+        logger.error("Error output: %s", result.stderr)
         if exit_on_error:
             exit(1)
     return result.stdout.strip()
 
+def run_int(argv, cwd=None):
+    """Run a command whose output is a single integer and return it, skipping text decoding."""
+    return int(subprocess.check_output(argv, cwd=cwd))
+
+def stream_command(argv, exit_on_error=True, cwd=None):
+    """Run a command given as an argv list and yield its stdout line by line as bytes."""
+    proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=-1, cwd=cwd)
+    for line in proc.stdout:
+        yield line.rstrip(b'\n')
+    stderr = proc.stderr.read().decode(errors='replace')
+    if proc.wait() != 0:
+        logger.error("Error running command: %s", shlex.join(argv))
+        logger.error("Error output: %s", stderr)
+        if exit_on_error:
+            exit(1)
+
+def delete_refs(prefix, cwd):
+    """Delete every ref under prefix in a single git update-ref --stdin session."""
+    refs = [ref for ref in stream_command(["git", "for-each-ref", "--format=%(refname)", prefix], exit_on_error=False, cwd=cwd) if ref]
+    if not refs:
+        return
+    
+    proc = subprocess.Popen(["git", "update-ref", "--stdin"], stdin=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
+    _, stderr = proc.communicate(b"".join(b"delete %s\n" % ref for ref in refs))
+    if proc.returncode != 0:
+        logger.error("Error deleting refs under %s", prefix)
+        logger.error("Error output: %s", stderr.decode(errors='replace'))
+
+def remove_directory(path):
+    """Move a directory aside and delete it in a detached background process."""
+    trash_path = f"{path}.trash-{os.getpid()}-{time.time_ns()}"
+    try:
+        # Atomic on the same filesystem, so the name is free immediately
+        os.rename(path, trash_path)
+        subprocess.Popen(["rm", "-rf", trash_path], stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError:
+        shutil.rmtree(trash_path if os.path.exists(trash_path) else path, ignore_errors=True)
+
+@functools.lru_cache(maxsize=1)
+def _git_filter_repo_path():
+    """Return the path to git-filter-repo on PATH, or None. Cached per process."""
+    return shutil.which("git-filter-repo")
+
 def ensure_git_filter_repo():
     """Ensures that git-filter-repo is installed."""
-    logging.info("Checking for git-filter-repo...")
-    result = run_command("which git-filter-repo", exit_on_error=False)
+    logger.info("Checking for git-filter-repo...")
+    result = _git_filter_repo_path()
     
     if not result:
-        logging.info("git-filter-repo not found. Installing...")
+        logger.info("git-filter-repo not found. Installing...")
         try:
             # Try installing with pip
-            run_command("pip install --break-system-packages git-filter-repo", exit_on_error=False)
+            run_command(["pip", "install", "--break-system-packages", "git-filter-repo"], exit_on_error=False)
             
             # Add ~/.local/bin to PATH temporarily if it exists
             local_bin = os.path.expanduser("~/.local/bin")
             if os.path.exists(local_bin):
                 os.environ["PATH"] = f"{local_bin}:{os.environ['PATH']}"
+            # Installing may have changed what is on PATH, so look again
+            _git_filter_repo_path.cache_clear()
                 
             # Verify installation
-            result = run_command("which git-filter-repo", exit_on_error=False)
+            result = _git_filter_repo_path()
             if not result:
-                logging.error("Failed to install git-filter-repo.")
-                logging.error("You can manually install with: pip install --break-system-packages git-filter-repo")
+                logger.error("Failed to install git-filter-repo.")
+                logger.error("You can manually install with: pip install --break-system-packages git-filter-repo")
                 exit(1)
             else:
-                logging.info(f"git-filter-repo installed at: {result}")
+                logger.info("git-filter-repo installed at: %s", result)
         except Exception as e:
-            logging.error(f"Error installing git-filter-repo: {e}")
+            logger.error("Error installing git-filter-repo: %s", e)
             exit(1)
 
-def validate_repo_url(url):
-    """Validate the repository URL format."""
-    if not (url.startswith("http://") or url.startswith("https://") or url.startswith("git@")):
-        logging.error(f"Invalid repository URL: {url}")
+def parse_repo_url(url):
+    """Validate a Git URL and return (url, repo_name); repo_name is None if it can't be determined."""
+    url = url.strip()
+    if not url.startswith(("http://", "https://", "git@")):
+        logger.error("Invalid repository URL: %s", url)
         exit(1)
-
-def extract_repo_name(url):
-    """Extract the repository name from a Git URL."""
+    
+    # Fast path: take the last path segment of a host/owner/repo[.git] URL
+    stripped = url.rstrip("/")
+    if "/" in stripped:
+        name = stripped.rsplit("/", 1)[-1]
+        if name.endswith(".git"):
+            name = name[:-4]
+        if name:
+            return url, name
+    
     # First try the standard pattern
-    match = re.search(r"/([^/]+?)(\.git)?$", url)
+    match = _REPO_RE.search(url)
     if match:
-        return match.group(1).replace(".git", "")
+        return url, match.group(1)
     
     # Try other GitHub URL patterns
-    github_match = re.search(r"github\.com/[^/]+/([^/\.]+)", url)
+    github_match = _GH_RE.search(url)
     if github_match:
-        return github_match.group(1)
+        return url, github_match.group(1)
         
-    logging.error(f"Could not extract repository name from URL: {url}")
-    return None
+    return url, None
 
 def generate_random_date_range(start_date, end_date, num_commits):
-    """Generate a list of random dates within the specified range."""
+    """Generate a sorted array of random unix timestamps within the specified range."""
     start = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
     
     if start >= end:
-        logging.error("Start date must be before end date")
-        return []
+        logger.error("Start date must be before end date")
+        return np.empty(0, dtype=np.int64)
     
-    # Generate random dates
-    dates = []
-    time_diff = end - start
-    for _ in range(num_commits):
-        random_days = random.randint(0, time_diff.days)
-        random_seconds = random.randint(0, 86400)  # Random time within the day
-        random_date = start + timedelta(days=random_days, seconds=random_seconds)
-        dates.append(random_date)
+    # Generate random timestamps in one vectorized call; a fresh generator
+    # per call keeps forked workers from sharing the parent's RNG state
+    rng = np.random.default_rng()
+    timestamps = rng.integers(int(start.timestamp()), int(end.timestamp()), size=num_commits, dtype=np.int64)
     
-    # Sort dates to maintain chronological order
-    dates.sort()
-    return dates
+    # Sort timestamps to maintain chronological order
+    timestamps.sort()
+    return timestamps
 
 def get_commit_count(repo_path):
     """Get the total number of commits in the repository."""
     try:
-        result = run_command("git rev-list --count --all", exit_on_error=False, cwd=repo_path)
-        return int(result) if result else 0
-    except:
+        return run_int(["git", "rev-list", "--count", "--all"], cwd=repo_path)
+    except (subprocess.CalledProcessError, OSError, ValueError):
         return 0
 
 def transfer_repo(old_repo_url, new_repo_url, new_author_name, new_author_email, 
                  replace_in_messages=False, replacements=None, modify_dates=False, 
-                 start_date=None, end_date=None):
-    """Transfers all branches from the old repo to the new repo with updated authorship and optionally modified dates."""
+                 start_date=None, end_date=None, work_dir=None):
+    """Transfers all branches from the old repo to the new repo with updated authorship and optionally modified dates.
+
+    If work_dir is given the clone is made inside it and the caller is
+    responsible for removing it. Returns True on success and False if the
+    transfer gave up early.
+    """
     bare_repo = None
-    original_dir = os.getcwd()
     
     try:
-        validate_repo_url(old_repo_url)
-        validate_repo_url(new_repo_url)
+        old_repo_url, repo_name = parse_repo_url(old_repo_url)
+        new_repo_url, _ = parse_repo_url(new_repo_url)
 
-        repo_name = extract_repo_name(old_repo_url)
         if not repo_name:
-            logging.error("Failed to extract repository name. Exiting.")
-            return
+            logger.error("Failed to extract repository name from URL: %s. Exiting.", old_repo_url)
+            return False
             
         bare_repo = f"{repo_name}.git"
+        if work_dir:
+            bare_repo = os.path.join(work_dir, bare_repo)
+        # Every git command runs with cwd=bare_repo, so pin it down once
+        bare_repo = os.path.abspath(bare_repo)
 
         # Clean up existing clone if present
         if os.path.exists(bare_repo):
-            logging.info(f"Removing existing directory: {bare_repo}")
-            shutil.rmtree(bare_repo, ignore_errors=True)
+            logger.info("Removing existing directory: %s", bare_repo)
+            remove_directory(bare_repo)
 
-        logging.info("Cloning the repository...")
-        run_command(f"git clone --bare {old_repo_url}")
+        logger.info("Cloning the repository...")
+        # A blobless partial clone (--filter=blob:none) would be smaller, but
+        # the fast-import side of filter-repo must resolve every blob the
+        # rewritten trees reference and cannot fetch them on demand, and
+        # --mirror would pull in host-specific refs (e.g. refs/pull/*) that
+        # push --mirror would then try to publish. Keep a full bare clone.
+        run_command(["git", "clone", "--bare", old_repo_url, bare_repo])
 
         if not os.path.exists(bare_repo):
-            logging.error(f"Failed to clone repository. Directory {bare_repo} not found.")
-            return
-
-        os.chdir(bare_repo)
+            logger.error("Failed to clone repository. Directory %s not found.", bare_repo)
+            return False
 
         ensure_git_filter_repo()
 
-        # Get commit count for date generation
-        commit_count = get_commit_count(".")
-        logging.info(f"Found {commit_count} commits in repository")
-        
-        # Step 1: Update author info and optionally messages
-        logging.info("Updating author information...")
+        # Generate the new dates up front so authorship and dates are
+        # rewritten in a single filter-repo pass
+        date_map_file = None
+        if modify_dates and start_date and end_date:
+            logger.info("Modifying commit dates to random dates between %s and %s...", start_date, end_date)
+            
+            # filter-repo hands commits to the callback parents-first, so only
+            # the count is needed to give every commit the next sorted date
+            commit_count = get_commit_count(bare_repo)
+            if not commit_count:
+                # rev-list --count failed or came back empty; count the commits directly
+                commit_count = sum(1 for c in stream_command(["git", "rev-list", "--all"], exit_on_error=False, cwd=bare_repo) if c)
+            logger.info("Found %s commits in repository", commit_count)
+            
+            # Generate random timestamps
+            timestamps = generate_random_date_range(start_date, end_date, commit_count)
+            if not len(timestamps):
+                logger.error("Could not generate new commit dates. Exiting without modifying the repository.")
+                return False
+            
+            # Write them as packed little-endian int64s for the callback to mmap
+            fd, date_map_file = tempfile.mkstemp(prefix="date_map_", suffix=".bin")
+            with os.fdopen(fd, 'wb') as f:
+                timestamps.astype('<i8').tofile(f)
+
+        # Update author info and optionally messages and dates
+        logger.info("Updating author information...")
         callback_parts = []
-        callback_parts.append(f"commit.author_name = commit.committer_name = b'{new_author_name}'")
-        callback_parts.append(f"commit.author_email = commit.committer_email = b'{new_author_email}'")
+        callback_parts.append(f"commit.author_name = commit.committer_name = {new_author_name.encode()!r}")
+        callback_parts.append(f"commit.author_email = commit.committer_email = {new_author_email.encode()!r}")
         
         if replace_in_messages and replacements:
-            logging.info(f"Will apply {len(replacements)} message replacement(s)")
+            logger.info("Will apply %s message replacement(s)", len(replacements))
             callback_parts.append("message = commit.message.decode('utf-8', errors='replace')")
             for old_text, new_text in replacements.items():
-                # Properly escape quotes
-                old_text_escaped = old_text.replace("\\", "\\\\").replace("'", "\\'")
-                new_text_escaped = new_text.replace("\\", "\\\\").replace("'", "\\'")
-                callback_parts.append(f"message = message.replace('{old_text_escaped}', '{new_text_escaped}')")
+                callback_parts.append(f"message = message.replace({old_text!r}, {new_text!r})")
             callback_parts.append("commit.message = message.encode('utf-8')")
         
-        callback = '; '.join(callback_parts)
+        if date_map_file:
+            # The callback body runs once per commit, so map the table and
+            # keep the position counter in globals() across calls
+            date_callback = """import mmap, struct
+_mm = globals().get('_date_mm')
+if _mm is None:
+    with open({path!r}, 'rb') as _f:
+        _mm = globals().setdefault('_date_mm', mmap.mmap(_f.fileno(), 0, access=mmap.ACCESS_READ))
+_idx = globals().setdefault('_date_idx', [0])
+if _idx[0] * 8 < len(_mm):
+    _ts = struct.unpack_from('<q', _mm, _idx[0] * 8)[0]
+    _idx[0] += 1
+    commit.author_date = commit.committer_date = b'%d +0000' % _ts"""
+            callback_parts.append(date_callback.format(path=date_map_file))
         
-        # Use single quotes on the outside, proper escaping inside
-        filter_cmd = f"git filter-repo --commit-callback '{callback}' --force"
-        run_command(filter_cmd)
+        callback = '\n'.join(callback_parts)
         
-        # Step 2: Modify dates if requested
-        if modify_dates and start_date and end_date:
-            logging.info(f"Modifying commit dates to random dates between {start_date} and {end_date}...")
-            
-            # Re-count commits after filter-repo (in case some were removed)
-            commit_count = get_commit_count(".")
-            
-            # Generate random dates
-            random_dates = generate_random_date_range(start_date, end_date, commit_count)
-            
-            # Create a Python script for date modification
-            date_script = """#!/usr/bin/env python3
-import sys
-dates = {dates_dict}
-commit_hash = sys.argv[1] if len(sys.argv) > 1 else None
-if commit_hash and commit_hash in dates:
-    print(dates[commit_hash])
-"""
-            
-            # Get list of all commits with their current dates
-            commits_output = run_command("git log --all --format='%H' --reverse")
-            commits = [c.strip() for c in commits_output.split('\n') if c.strip()]
-            
-            if len(commits) != len(random_dates):
-                logging.warning(f"Commit count mismatch: {len(commits)} commits vs {len(random_dates)} dates")
-                # Adjust if needed
-                if len(commits) > len(random_dates):
-                    # Generate more dates
-                    random_dates = generate_random_date_range(start_date, end_date, len(commits))
-            
-            # Create mapping of commit hash to new timestamp
-            commit_date_map = {}
-            for i, commit in enumerate(commits):
-                if i < len(random_dates):
-                    commit_date_map[commit] = int(random_dates[i].timestamp())
-            
-            # Create environment filter for git filter-branch
-            # Note: git filter-branch is deprecated but git-filter-repo doesn't easily support date changes
-            env_filter_parts = []
-            for commit_hash, timestamp in commit_date_map.items():
-                env_filter_parts.append(f'if [ "$GIT_COMMIT" = "{commit_hash}" ]; then export GIT_AUTHOR_DATE="{timestamp}"; export GIT_COMMITTER_DATE="{timestamp}"; fi')
-            
-            env_filter = '\n'.join(env_filter_parts)
-            
-            # Write to a temporary file to avoid command line length issues
-            with open('/tmp/date_filter.sh', 'w') as f:
-                f.write(env_filter)
-            
-            # Use git filter-branch with the environment filter
-            filter_branch_cmd = f'git filter-branch -f --env-filter "$(cat /tmp/date_filter.sh)" -- --all'
-            run_command(filter_branch_cmd)
-            
-            # Clean up refs
-            run_command('rm -rf .git/refs/original/', exit_on_error=False)
-            run_command('git reflog expire --expire=now --all', exit_on_error=False)
-            run_command('git gc --prune=now --aggressive', exit_on_error=False)
+        try:
+            run_command(["git", "filter-repo", "--commit-callback", callback, "--force"], cwd=bare_repo)
+        finally:
+            if date_map_file:
+                os.remove(date_map_file)
 
-        logging.info("Adding new repository remote...")
+        # Older git-filter-repo releases add a refs/replace/ entry per rewritten
+        # commit; drop them so push --mirror doesn't publish them
+        delete_refs("refs/replace/", bare_repo)
+
+        logger.info("Adding new repository remote...")
         # Remove any existing 'new-origin' remote
-        run_command("git remote remove new-origin", exit_on_error=False)
-        run_command(f"git remote add new-origin {new_repo_url}")
+        run_command(["git", "remote", "remove", "new-origin"], exit_on_error=False, cwd=bare_repo)
+        run_command(["git", "remote", "add", "new-origin", new_repo_url], cwd=bare_repo)
 
-        logging.info("Pushing all branches and tags to the new repository...")
-        run_command("git push --mirror new-origin")
+        logger.info("Pushing all branches and tags to the new repository...")
+        run_command(["git", "push", "--mirror", "new-origin"], cwd=bare_repo)
 
-        logging.info("✅ Repository transfer complete!")
+        logger.info("✅ Repository transfer complete!")
+        return True
 
     except Exception as e:
-        logging.error(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         import traceback
         traceback.print_exc()
         exit(1)
 
     finally:
-        # Change back to original directory
-        os.chdir(original_dir)
-        
-        # Clean up bare repo
-        if bare_repo and os.path.exists(bare_repo):
-            logging.info(f"Cleaning up temporary repository: {bare_repo}")
-            shutil.rmtree(bare_repo, ignore_errors=True)
+        # Clean up bare repo, unless it lives in a caller-owned work_dir
+        if bare_repo and not work_dir and os.path.exists(bare_repo):
+            logger.info("Cleaning up temporary repository: %s", bare_repo)
+            remove_directory(bare_repo)
 
-if __name__ == "__main__":
+def _run_one(job):
+    """Run a single transfer job inside its own temporary directory and report how it went.
+
+    The whole work_dir, clone included, is removed with one background delete.
+    """
+    result = {"old_repo_url": job.get("old_repo_url"), "success": False, "error": None}
+    work_dir = tempfile.mkdtemp(prefix="gitcheat_")
+    try:
+        result["success"] = bool(transfer_repo(**job, work_dir=work_dir))
+        if not result["success"]:
+            result["error"] = "transfer aborted, see log for details"
+    except SystemExit as e:
+        # transfer_repo exits on command failures; keep that from ending the batch
+        result["error"] = f"transfer exited with status {e.code}"
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        remove_directory(work_dir)
+    return result
+
+def transfer_repos(jobs, num_workers=None):
+    """Transfer several repositories concurrently.
+
+    Each job is a dict of transfer_repo keyword arguments. num_workers
+    defaults to the number of CPUs. Returns one dict per job, in order,
+    with the job's old_repo_url, a success flag and an error message.
+    """
+    # Check once up front so workers find the lookup already cached
+    ensure_git_filter_repo()
+    with ProcessPoolExecutor(num_workers) as executor:
+        return list(executor.map(_run_one, jobs))
+
+def main():
+    """Prompt for the transfer settings and run the transfer interactively."""
     print(r"""
        ____   ___   _____            ____   _   _   _____      _      _____ 
       / ___| |_ _| |_   _|          / ___| | | | | | ____|    / \    |_   _|
@@ -269,7 +356,7 @@ if __name__ == "__main__":
             datetime.strptime(start_date, "%Y-%m-%d")
             datetime.strptime(end_date, "%Y-%m-%d")
         except ValueError:
-            logging.error("Invalid date format. Please use YYYY-MM-DD format.")
+            logger.error("Invalid date format. Please use YYYY-MM-DD format.")
             exit(1)
     
     replacements = {}
@@ -301,4 +388,7 @@ if __name__ == "__main__":
     
     # Execute transfer
     transfer_repo(old_repo_url, new_repo_url, new_author_name, new_author_email, 
-                 bool(replacements), replacements, modify_dates, start_date, end_date)
\ No newline at end of file
+                 bool(replacements), replacements, modify_dates, start_date, end_date)
+
+if __name__ == "__main__":
+    main()